@@ -1,46 +1,233 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import functools
+import logging
+import numbers
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from borsdata import constants as constants
 
+# orjson is optional, it parses large responses considerably faster
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
-# pandas options for string representation of data frames (print)
-pd.set_option("display.max_columns", None)
-pd.set_option("display.max_rows", None)
+
+class BorsdataAPIError(Exception):
+    """
+    Raised when the API responds with an error status code
+    """
+
+    def __init__(self, status_code, text) -> None:
+        super().__init__(f"API-Error, status code: {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def configure_display() -> None:
+    """
+    Set pandas options to print data frames without truncating rows/columns
+    """
+    pd.set_option("display.max_columns", None)
+    pd.set_option("display.max_rows", None)
+
+
+def _cache_metadata(method):
+    """
+    Memoize a metadata getter on the instance, callers get a copy
+    """
+
+    @functools.wraps(method)
+    def wrapper(self):
+        if method.__name__ not in self._metadata_cache:
+            self._metadata_cache[method.__name__] = method(self)
+        return self._metadata_cache[method.__name__].copy()
+
+    return wrapper
+
+
+class _RateLimitedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that takes a rate limit token before each request sent over
+    the network, so responses served from the cache are not throttled
+    """
+
+    def __init__(self, acquire_token, **kwargs) -> None:
+        self._acquire_token = acquire_token
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs) -> requests.Response:
+        self._acquire_token()
+        return super().send(request, **kwargs)
 
 
 class BorsdataAPI:
-    def __init__(self, _api_key) -> None:
+    # response cache lifetimes per endpoint, first match wins (cache=True),
+    # stock prices expire at the next daily update, see _call_api
+    _CACHE_EXPIRE_AFTER = {
+        re.compile(
+            r".*/v1/(branches|countries|markets|sectors|translationmetadata"
+            r"|instruments/kpis/metadata|instruments/reports/metadata)(\?|$)"
+        ): timedelta(days=30),
+        re.compile(r".*/reports.*"): timedelta(hours=6),
+    }
+
+    # column renames for the abbreviated API keys
+    _STOCK_PRICE_RENAME = {
+        "d": "date",
+        "c": "close",
+        "h": "high",
+        "l": "low",
+        "o": "open",
+        "v": "volume",
+    }
+    _STOCK_PRICE_RENAME_WITH_I = {**_STOCK_PRICE_RENAME, "i": "insId"}
+    _KPI_RENAME = {"y": "year", "p": "period", "v": "kpiValue"}
+    _KPI_SUMMARY_RENAME = {**_KPI_RENAME, "KpiId": "kpiId"}
+    _KPI_INSTR_RENAME = {"i": "insId", "n": "valueNum", "s": "valueStr"}
+    # max. number of instruments per call to the list endpoints
+    _MAX_INSTRUMENTS = 50
+
+    def __init__(self, _api_key, cache=False) -> None:
+        """
+        API calls are logged at DEBUG level to the 'borsdata.borsdata_api' logger
+        :param _api_key: Börsdata API key
+        :param cache: True to keep responses in an on-disk cache (requires requests-cache)
+        """
+        self._log = logging.getLogger(__name__)
         self._api_key = _api_key
         self._url_root = "https://apiservice.borsdata.se/v1/"
-        self._last_api_call = 0
         self._api_calls_per_second = 10
+        # token bucket for rate limiting, allows short bursts up to capacity
+        self._capacity = 10
+        self._tokens = float(self._capacity)
+        # monotonic clock, unaffected by wall-clock jumps
+        self._last_refill_monotonic = time.monotonic()
+        self._rate_lock = threading.Lock()
         self._params = {
             "authKey": self._api_key,
             "maxYearCount": 20,
             "maxR12QCount": 40,
             "maxCount": 20,
         }
+        # persistent session, reuses pooled connections to the API host
+        self._cache = cache
+        if cache:
+            import requests_cache
+
+            self._session = requests_cache.CachedSession(
+                cache_name="borsdata_cache",
+                backend="sqlite",
+                use_cache_dir=True,
+                expire_after=timedelta(hours=6),
+                urls_expire_after=self._CACHE_EXPIRE_AFTER,
+                allowable_methods=("GET",),
+                ignored_parameters=["authKey"],
+                stale_if_error=True,
+            )
+        else:
+            self._session = requests.Session()
+        self._session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "User-Agent": "borsdata-python/1.0"}
+        )
+        self._session.mount(
+            "https://",
+            _RateLimitedAdapter(
+                self._acquire_token,
+                pool_connections=4,
+                pool_maxsize=16,
+                # exponential backoff on 429/5xx, honours Retry-After
+                max_retries=Retry(
+                    total=5,
+                    backoff_factor=0.5,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    raise_on_status=False,
+                ),
+            ),
+        )
 
-    def _call_api(self, url, **kwargs) -> requests.Response | Any:
+        # quasi-static metadata frames, see invalidate_metadata()
+        self._metadata_cache = {}
+        # worker pool for batch helpers, throttled by the shared token bucket
+        self._pool = ThreadPoolExecutor(max_workers=8)
+
+    def __enter__(self) -> "BorsdataAPI":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the underlying HTTP session and worker pool
         """
-        Internal function for API calls
+        self._pool.shutdown(wait=True)
+        self._session.close()
+
+    def _call_api(self, url, **kwargs) -> Any:
+        """
+        Internal function for API calls, 429/5xx responses are retried by the session
         :param url: URL add to URL root
         :params: Additional URL parameters
         :return: JSON-encoded content, if any
-        """
-        current_time = time.time()
-        time_delta = current_time - self._last_api_call
-        if time_delta < 1 / self._api_calls_per_second:
-            time.sleep(1 / self._api_calls_per_second - time_delta)
-        response = requests.get(self._url_root + url, self._get_params(**kwargs))
-        print(response.url)
-        self._last_api_call = time.time()
+        :raises BorsdataAPIError: If the API does not respond with status 200
+        """
+        cache_kwargs = {}
+        if self._cache and "stockprices" in url:
+            cache_kwargs["expire_after"] = self._next_stock_price_update()
+        response = self._session.get(
+            self._url_root + url,
+            params=self._get_params(**kwargs),
+            timeout=(5, 30),
+            **cache_kwargs,
+        )
+        self._log.debug("GET %s -> %s", url, response.status_code)
         if response.status_code != 200:
-            print(f"API-Error, status code: {response.status_code}")
-            return response
-        return response.json()
+            raise BorsdataAPIError(response.status_code, response.text)
+        return _json.loads(response.content)
+
+    @staticmethod
+    def _next_stock_price_update() -> datetime:
+        """
+        Get the time stock prices are next updated, 18:00 UTC
+        :return: datetime (UTC)
+        """
+        now = datetime.now(timezone.utc)
+        update = now.replace(hour=18, minute=0, second=0, microsecond=0)
+        if update <= now:
+            update += timedelta(days=1)
+        return update
+
+    def invalidate_metadata(self) -> None:
+        """
+        Clear cached metadata so it is fetched again on next call
+        """
+        self._metadata_cache.clear()
+
+    def _acquire_token(self) -> None:
+        """
+        Take one token from the rate limit bucket, sleep if it is empty
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            elapsed = now - self._last_refill_monotonic
+            self._tokens = min(
+                self._capacity, self._tokens + elapsed * self._api_calls_per_second
+            )
+            self._last_refill_monotonic = now
+            if self._tokens < 1:
+                time.sleep((1 - self._tokens) / self._api_calls_per_second)
+                self._tokens = 0.0
+                self._last_refill_monotonic = time.monotonic()
+            else:
+                self._tokens -= 1
 
     def _get_params(self, **kwargs) -> dict[str, Any]:
         params = self._params.copy()
@@ -49,32 +236,82 @@ class BorsdataAPI:
                 # fix for reserved keyword 'from' in python.
                 if key == "from_date":
                     params["from"] = value
-                elif key == "to" or key == "date":
+                elif key == "to" or key == "date" or key == "maxCount":
                     params[key] = value
                 elif key == "instList":
                     params[key] = ",".join(str(stock_id) for stock_id in value)
                 else:
-                    print(f"BorsdataAPI >> Unknown param: {key}={value}")
+                    self._log.warning("Unknown param: %s=%s", key, value)
         return params
 
     @staticmethod
-    def _set_index(df, index, ascending=True) -> None:
+    def _set_index(df, index, ascending=True, sort=True) -> None:
         """
         Set index(es) and sort by index
         :param df: pd.DataFrame
         :param index: Column name to set to index
         :param ascending: True to sort index ascending
+        :param sort: False to keep the order returned by the API
         """
-        if type(index) == list:
-            for idx in index:
-                if not idx in df.columns.array:
-                    return
-        else:
-            if not index in df.columns:
-                return
+        idxs = index if isinstance(index, list) else [index]
+        if not set(idxs).issubset(df.columns):
+            return
 
         df.set_index(index, inplace=True)
-        df.sort_index(inplace=True, ascending=ascending)
+        if sort:
+            df.sort_index(inplace=True, ascending=ascending)
+
+    @staticmethod
+    def _downcast(
+        df,
+        floats=("open", "high", "low", "close"),
+        ints=("insId", "stock_id", "year", "period"),
+    ) -> None:
+        """
+        Cast numeric columns to fixed smaller dtypes, if available. The float32
+        cast is lossy (about 7 significant digits), so it is only applied to prices
+        :param df: pd.DataFrame
+        :param floats: Column names to cast to float32
+        :param ints: Column names to cast to int32 (skipped if the column has nulls)
+        """
+        for key in df.columns.intersection(floats):
+            df[key] = df[key].astype("float32")
+        for key in df.columns.intersection(ints):
+            if df[key].notna().all():
+                df[key] = df[key].astype("int32")
+
+    @classmethod
+    def _chunks(cls, ins_ids) -> list[list[int]]:
+        """
+        Split instrument IDs into lists accepted by the list endpoints
+        :param ins_ids: Instrument ID or Instrument ID list
+        :return: List of Instrument ID lists, empty if ins_ids is empty
+        """
+        if isinstance(ins_ids, numbers.Integral):
+            ins_ids = [ins_ids]
+        ins_ids = list(ins_ids)
+        return [
+            ins_ids[i : i + cls._MAX_INSTRUMENTS]
+            for i in range(0, len(ins_ids), cls._MAX_INSTRUMENTS)
+        ]
+
+    @staticmethod
+    def _strip_underscore(column) -> str:
+        """
+        Remove underscores from a report column name, e.g. 'report_Date' -> 'reportDate'
+        :param column: Column name
+        :return: Column name without underscores
+        """
+        return column.replace("_", "")
+
+    @staticmethod
+    def _frame_flat(records) -> pd.DataFrame:
+        """
+        Build a DataFrame from a flat list of dicts (no nested records)
+        :param records: List of dicts
+        :return: pd.DataFrame
+        """
+        return pd.DataFrame.from_records(records)
 
     @staticmethod
     def _parse_date(df, key) -> None:
@@ -84,25 +321,27 @@ class BorsdataAPI:
         :param key: Column name
         """
         if key in df:
-            df[key] = pd.to_datetime(df[key])
+            df[key] = pd.to_datetime(
+                df[key], format="ISO8601", cache=True, errors="coerce"
+            )
 
-    def _get_base_params(self) -> dict[str, Any]:
+    @staticmethod
+    def _parse_dates(df, keys) -> None:
         """
-        Get URL parameter base
-        :return: Parameters dict
+        Parse several date string columns as pd.datetime, if available
+        :param df: pd.DataFrame
+        :param keys: Column names
         """
-        return {
-            "authKey": self._api_key,
-            "version": 1,
-            "maxYearCount": 20,
-            "maxR12QCount": 40,
-            "maxCount": 20,
-        }
+        for key in df.columns.intersection(keys):
+            df[key] = pd.to_datetime(
+                df[key], format="ISO8601", cache=True, errors="coerce"
+            )
 
     """
     Instrument Metadata
     """
 
+    @_cache_metadata
     def get_branches(self) -> pd.DataFrame:
         """
         Get branch data
@@ -110,10 +349,11 @@ class BorsdataAPI:
         """
         url = "branches"
         json_data = self._call_api(url)
-        df = pd.json_normalize(json_data["branches"])
-        self._set_index(df, "id")
+        df = self._frame_flat(json_data["branches"])
+        self._set_index(df, "id", sort=False)
         return df
 
+    @_cache_metadata
     def get_countries(self) -> pd.DataFrame:
         """
         Get country data
@@ -121,10 +361,11 @@ class BorsdataAPI:
         """
         url = "countries"
         json_data = self._call_api(url)
-        df = pd.json_normalize(json_data["countries"])
-        self._set_index(df, "id")
+        df = self._frame_flat(json_data["countries"])
+        self._set_index(df, "id", sort=False)
         return df
 
+    @_cache_metadata
     def get_markets(self) -> pd.DataFrame:
         """
         Get market data
@@ -132,10 +373,11 @@ class BorsdataAPI:
         """
         url = "markets"
         json_data = self._call_api(url)
-        df = pd.json_normalize(json_data["markets"])
-        self._set_index(df, "id")
+        df = self._frame_flat(json_data["markets"])
+        self._set_index(df, "id", sort=False)
         return df
 
+    @_cache_metadata
     def get_sectors(self) -> pd.DataFrame:
         """
         Get sector data
@@ -143,10 +385,11 @@ class BorsdataAPI:
         """
         url = "sectors"
         json_data = self._call_api(url)
-        df = pd.json_normalize(json_data["sectors"])
-        self._set_index(df, "id")
+        df = self._frame_flat(json_data["sectors"])
+        self._set_index(df, "id", sort=False)
         return df
 
+    @_cache_metadata
     def get_translation_metadata(self) -> pd.DataFrame:
         """
         Get translation metadata
@@ -169,7 +412,7 @@ class BorsdataAPI:
         """
         url = "instruments"
         json_data = self._call_api(url)
-        df = pd.json_normalize(json_data["instruments"])
+        df = self._frame_flat(json_data["instruments"])
         self._parse_date(df, "listingDate")
         self._set_index(df, "insId")
         return df
@@ -183,8 +426,7 @@ class BorsdataAPI:
         """
         url = "instruments/updated"
         json_data = self._call_api(url)
-        print(json_data)
-        df = pd.json_normalize(json_data["instruments"])
+        df = self._frame_flat(json_data["instruments"])
         self._parse_date(df, "updatedAt")
         self._set_index(df, "insId")
         return df
@@ -210,6 +452,17 @@ class BorsdataAPI:
         self._set_index(df, ["insId", "lang"])
         return df
 
+    def get_descriptions(self, ins_ids) -> pd.DataFrame:
+        """
+        Get instrument descriptions for any number of instruments, 50 per API call
+        :param ins_ids: Instrument ID or Instrument ID list
+        :return: pd.DataFrame
+        """
+        chunks = self._chunks(ins_ids)
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat([self.get_instrument_descriptions(chunk) for chunk in chunks])
+
     """
     KPIs
     """
@@ -227,15 +480,10 @@ class BorsdataAPI:
         :return: pd.DataFrame
         """
         url = f"instruments/{ins_id}/kpis/{kpi_id}/{report_type}/{price_type}/history"
-
-        params = self._get_base_params()
-        if max_count is not None:
-            params["maxCount"] = max_count
-
-        json_data = self._call_api(url)
-        print(json_data["values"])
-        df = pd.json_normalize(json_data["values"])
-        df.rename(columns={"y": "year", "p": "period", "v": "kpiValue"}, inplace=True)
+        json_data = self._call_api(url, maxCount=max_count)
+        df = self._frame_flat(json_data["values"])
+        df.rename(columns=self._KPI_RENAME, inplace=True)
+        self._downcast(df)
         self._set_index(df, ["year", "period"], ascending=False)
         return df
 
@@ -248,18 +496,15 @@ class BorsdataAPI:
         :return: pd.DataFrame
         """
         url = f"instruments/{ins_id}/kpis/{report_type}/summary"
-        if max_count is not None:
-            self._params["maxCount"] = max_count
-        json_data = self._call_api(url)
+        json_data = self._call_api(url, maxCount=max_count)
         df = pd.json_normalize(json_data["kpis"], record_path="values", meta="KpiId")
-        df.rename(
-            columns={"y": "year", "p": "period", "v": "kpiValue", "KpiId": "kpiId"},
-            inplace=True,
-        )
-        df = df.pivot_table(
-            index=["year", "period"], columns="kpiId", values="kpiValue"
-        )
-        self._set_index(df, ["year", "period"], ascending=False)
+        df.rename(columns=self._KPI_SUMMARY_RENAME, inplace=True)
+        self._downcast(df)
+        # (year, period, kpiId) is unique, reshape without aggregating
+        df = df.set_index(["year", "period", "kpiId"])["kpiValue"].unstack("kpiId")
+        # drop KPIs and periods without values, like pivot_table did
+        df = df.dropna(axis=1, how="all").dropna(how="all")
+        df.sort_index(inplace=True, ascending=False)
         return df
 
     def get_kpi_data_instrument(self, ins_id, kpi_id, calc_group, calc) -> pd.DataFrame:
@@ -274,10 +519,8 @@ class BorsdataAPI:
         url = f"instruments/{ins_id}/kpis/{kpi_id}/{calc_group}/{calc}"
         json_data = self._call_api(url)
         df = pd.json_normalize(json_data["value"])
-        df.rename(
-            columns={"i": "insId", "n": "valueNum", "s": "valueStr"},
-            inplace=True,
-        )
+        df.rename(columns=self._KPI_INSTR_RENAME, inplace=True)
+        self._downcast(df)
         self._set_index(df, "insId")
         return df
 
@@ -291,11 +534,9 @@ class BorsdataAPI:
         """
         url = f"instruments/kpis/{kpi_id}/{calc_group}/{calc}"
         json_data = self._call_api(url)
-        df = pd.json_normalize(json_data["values"])
-        df.rename(
-            columns={"i": "insId", "n": "valueNum", "s": "valueStr"},
-            inplace=True,
-        )
+        df = self._frame_flat(json_data["values"])
+        df.rename(columns=self._KPI_INSTR_RENAME, inplace=True)
+        self._downcast(df)
         self._set_index(df, "insId")
         return df
 
@@ -308,6 +549,7 @@ class BorsdataAPI:
         json_data = self._call_api(url)
         return pd.to_datetime(json_data["kpisCalcUpdated"])
 
+    @_cache_metadata
     def get_kpi_metadata(self) -> pd.DataFrame:
         """
         Get KPI metadata
@@ -316,7 +558,7 @@ class BorsdataAPI:
         url = "instruments/kpis/metadata"
         json_data = self._call_api(url)
         df = pd.json_normalize(json_data["kpiHistoryMetadatas"])
-        self._set_index(df, "kpiId")
+        self._set_index(df, "kpiId", sort=False)
         return df
 
     """
@@ -335,15 +577,12 @@ class BorsdataAPI:
         """
         url = f"instruments/{ins_id}/reports/{report_type}"
 
-        if max_count is not None:
-            self._params["maxCount"] = max_count
-        json_data = self._call_api(url)
+        json_data = self._call_api(url, maxCount=max_count)
 
-        df = pd.json_normalize(json_data["reports"])
-        df.columns = [x.replace("_", "") for x in df.columns]
-        self._parse_date(df, "reportStartDate")
-        self._parse_date(df, "reportEndDate")
-        self._parse_date(df, "reportDate")
+        df = self._frame_flat(json_data["reports"])
+        df.rename(columns=self._strip_underscore, inplace=True)
+        self._parse_dates(df, ["reportStartDate", "reportEndDate", "reportDate"])
+        self._downcast(df)
         self._set_index(df, ["year", "period"], ascending=False)
         return df
 
@@ -358,15 +597,26 @@ class BorsdataAPI:
         json_data = self._call_api(url)
         dfs = []
         for report_type in ["reportsQuarter", "reportsYear", "reportsR12"]:
-            df = pd.json_normalize(json_data[report_type])
-            df.columns = [x.replace("_", "") for x in df.columns]
-            self._parse_date(df, "reportStartDate")
-            self._parse_date(df, "reportEndDate")
-            self._parse_date(df, "reportDate")
+            df = self._frame_flat(json_data[report_type])
+            df.rename(columns=self._strip_underscore, inplace=True)
+            self._parse_dates(df, ["reportStartDate", "reportEndDate", "reportDate"])
+            self._downcast(df)
             self._set_index(df, ["year", "period"], ascending=False)
             dfs.append(df)
         return dfs
 
+    def get_instrument_reports_many(self, ins_ids) -> dict[int, list]:
+        """
+        Get all report data for several instruments, fetched concurrently
+        :param ins_ids: Instrument ID list
+        :return: dict of Instrument ID -> [pd.DataFrame quarter, pd.DataFrame year, pd.DataFrame r12]
+        """
+        futures = {
+            ins_id: self._pool.submit(self.get_instrument_reports, ins_id)
+            for ins_id in ins_ids
+        }
+        return {ins_id: future.result() for ins_id, future in futures.items()}
+
     def get_instrument_report_list(
         self, stock_id_list
     ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
@@ -378,35 +628,48 @@ class BorsdataAPI:
         url = f"instruments/reports"
         json_data = self._call_api(url, instList=stock_id_list)
 
-        r12 = pd.json_normalize(
-            json_data["reportList"], record_path="reportsR12", meta=["instrument"]
-        )
-        r12 = r12.rename(columns=str.lower)
-        r12 = r12.rename(columns={"instrument": "stock_id"})
-        self._parse_date(r12, "report_start_date")
-        self._parse_date(r12, "report_end_date")
-        self._parse_date(r12, "report_date")
-
-        quarter = pd.json_normalize(
-            json_data["reportList"], record_path="reportsQuarter", meta=["instrument"]
-        )
-        quarter = quarter.rename(columns=str.lower)
-        quarter = quarter.rename(columns={"instrument": "stock_id"})
-        self._parse_date(quarter, "report_start_date")
-        self._parse_date(quarter, "report_end_date")
-        self._parse_date(quarter, "report_date")
-
-        year = pd.json_normalize(
-            json_data["reportList"], record_path="reportsYear", meta=["instrument"]
-        )
-        year = year.rename(columns=str.lower)
-        year = year.rename(columns={"instrument": "stock_id"})
-        self._parse_date(year, "report_start_date")
-        self._parse_date(year, "report_end_date")
-        self._parse_date(year, "report_date")
+        # walk the report list once, tagging each report with its instrument
+        quarter_rows, year_rows, r12_rows = [], [], []
+        for item in json_data["reportList"]:
+            stock_id = item["instrument"]
+            for rows, key in (
+                (quarter_rows, "reportsQuarter"),
+                (year_rows, "reportsYear"),
+                (r12_rows, "reportsR12"),
+            ):
+                for report in item[key]:
+                    report["stock_id"] = stock_id
+                    rows.append(report)
 
+        dfs = []
+        for rows in (quarter_rows, year_rows, r12_rows):
+            df = self._frame_flat(rows).rename(columns=str.lower)
+            self._parse_dates(
+                df, ["report_start_date", "report_end_date", "report_date"]
+            )
+            self._downcast(df)
+            dfs.append(df)
+        quarter, year, r12 = dfs
+
+        return quarter, year, r12
+
+    def get_reports(self, ins_ids) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Get all report data for one or more instruments, 50 per API call
+        :param ins_ids: Instrument ID or Instrument ID list
+        :return: [pd.DataFrame quarter, pd.DataFrame year, pd.DataFrame r12], same
+            format as get_instrument_report_list
+        """
+        chunks = self._chunks(ins_ids)
+        if not chunks:
+            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        reports = [self.get_instrument_report_list(chunk) for chunk in chunks]
+        quarter, year, r12 = (
+            pd.concat(dfs, ignore_index=True) for dfs in zip(*reports)
+        )
         return quarter, year, r12
 
+    @_cache_metadata
     def get_reports_metadata(self) -> pd.DataFrame:
         """
         Get reports metadata
@@ -452,23 +715,35 @@ class BorsdataAPI:
         :return: pd.DataFrame
         """
         url = f"instruments/{ins_id}/stockprices"
-        json_data = self._call_api(url, from_date=from_date, to=to_date)
-        df = pd.json_normalize(json_data["stockPricesList"])
-        df.rename(
-            columns={
-                "d": "date",
-                "c": "close",
-                "h": "high",
-                "l": "low",
-                "o": "open",
-                "v": "volume",
-            },
-            inplace=True,
+        json_data = self._call_api(
+            url, from_date=from_date, to=to_date, maxCount=max_count
         )
+        df = self._frame_flat(json_data["stockPricesList"])
+        df.rename(columns=self._STOCK_PRICE_RENAME, inplace=True)
         self._parse_date(df, "date")
+        self._downcast(df)
         self._set_index(df, "date", ascending=False)
         return df
 
+    def get_instrument_stock_prices_many(
+        self, ins_ids, from_date=None, to_date=None, max_count=None
+    ) -> dict[int, pd.DataFrame]:
+        """
+        Get stock prices for several instruments, fetched concurrently
+        :param ins_ids: Instrument ID list
+        :param from_date: Start date in string format, e.g. '2000-01-01'
+        :param to_date: Stop date in string format, e.g. '2000-01-01'
+        :param max_count: Max. number of history (quarters/years) to get
+        :return: dict of Instrument ID -> pd.DataFrame
+        """
+        futures = {
+            ins_id: self._pool.submit(
+                self.get_instrument_stock_prices, ins_id, from_date, to_date, max_count
+            )
+            for ins_id in ins_ids
+        }
+        return {ins_id: future.result() for ins_id, future in futures.items()}
+
     def get_instrument_stock_prices_list(
         self, stock_id_list, from_date=None, to_date=None
     ) -> pd.DataFrame:
@@ -483,24 +758,56 @@ class BorsdataAPI:
         json_data = self._call_api(
             url, from_date=from_date, to=to_date, instList=stock_id_list
         )
-        stock_prices = pd.json_normalize(
-            json_data["stockPricesArrayList"], "stockPricesList", ["instrument"]
-        )
-        stock_prices.rename(
-            columns={
-                "d": "date",
-                "c": "close",
-                "h": "high",
-                "l": "low",
-                "o": "open",
-                "v": "volume",
-                "instrument": "stock_id",
-            },
-            inplace=True,
+        # build columns directly instead of flattening each price record
+        d, o, h, l, c, v, stock_id = [], [], [], [], [], [], []
+        for group in json_data["stockPricesArrayList"]:
+            prices = group["stockPricesList"]
+            for price in prices:
+                d.append(price["d"])
+                o.append(price.get("o"))
+                h.append(price.get("h"))
+                l.append(price.get("l"))
+                c.append(price.get("c"))
+                v.append(price.get("v"))
+            stock_id.extend([group["instrument"]] * len(prices))
+        stock_prices = pd.DataFrame(
+            {
+                "date": d,
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+                "stock_id": stock_id,
+            }
         )
-        stock_prices.fillna(0, inplace=True)
+        self._parse_date(stock_prices, "date")
+        price_columns = ["open", "high", "low", "close", "volume"]
+        stock_prices[price_columns] = stock_prices[price_columns].fillna(0)
+        self._downcast(stock_prices)
         return stock_prices
 
+    def get_stock_prices(self, ins_ids, from_date=None, to_date=None) -> pd.DataFrame:
+        """
+        Get stock prices for one or more instruments, 50 per API call
+        :param ins_ids: Instrument ID or Instrument ID list
+        :param from_date: Start date in string format, e.g. '2000-01-01'
+        :param to_date: Stop date in string format, e.g. '2000-01-01'
+        :return: pd.DataFrame, same format as get_instrument_stock_prices_list
+        """
+        chunks = self._chunks(ins_ids)
+        if not chunks:
+            return pd.DataFrame(
+                columns=["date", "open", "high", "low", "close", "volume", "stock_id"]
+            )
+        return pd.concat(
+            [
+                self.get_instrument_stock_prices_list(chunk, from_date, to_date)
+                for chunk in chunks
+            ],
+            ignore_index=True,
+        )
+
     def get_instruments_stock_prices_last(self) -> pd.DataFrame:
         """
         Get last days' stock prices for all instruments
@@ -508,20 +815,10 @@ class BorsdataAPI:
         """
         url = "instruments/stockprices/last"
         json_data = self._call_api(url)
-        df = pd.json_normalize(json_data["stockPricesList"])
-        df.rename(
-            columns={
-                "d": "date",
-                "i": "insId",
-                "c": "close",
-                "h": "high",
-                "l": "low",
-                "o": "open",
-                "v": "volume",
-            },
-            inplace=True,
-        )
+        df = self._frame_flat(json_data["stockPricesList"])
+        df.rename(columns=self._STOCK_PRICE_RENAME_WITH_I, inplace=True)
         self._parse_date(df, "date")
+        self._downcast(df)
         self._set_index(df, "date", ascending=False)
         return df
 
@@ -534,20 +831,10 @@ class BorsdataAPI:
         url = "instruments/stockprices/date"
 
         json_data = self._call_api(url, date=date)
-        df = pd.json_normalize(json_data["stockPricesList"])
-        df.rename(
-            columns={
-                "d": "date",
-                "i": "insId",
-                "c": "close",
-                "h": "high",
-                "l": "low",
-                "o": "open",
-                "v": "volume",
-            },
-            inplace=True,
-        )
+        df = self._frame_flat(json_data["stockPricesList"])
+        df.rename(columns=self._STOCK_PRICE_RENAME_WITH_I, inplace=True)
         self._parse_date(df, "date")
+        self._downcast(df)
         self._set_index(df, "insId")
         return df
 